@@ -0,0 +1,16 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def queue_handler():
+    """
+    Handler that only puts records on a queue
+    A listener thread writes them to stderr, so request threads never wait on the stream
+    """
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return QueueHandler(log_queue)
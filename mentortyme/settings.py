@@ -35,6 +35,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'social_django.middleware.SocialAuthExceptionMiddleware',
+    'user.middleware.SlugProfileCacheMiddleware',
+    'user.middleware.CurrentProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'mentortyme.urls'
@@ -110,6 +112,10 @@ SOCIAL_AUTH_GOOGLE_OAUTH2_AUTH_EXTRA_ARGUMENTS = {
     'prompt': 'consent',
 }
 
+# Google Calendar events are created/deleted in a background thread;
+# set to False to sync them inside the request
+GOOGLE_CALENDAR_SYNC_IN_BACKGROUND = True
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -125,4 +131,26 @@ DEFAULT_FROM_EMAIL = 'support@mentortyme.com'
 
 SOCIAL_AUTH_RAISE_EXCEPTIONS = False
 
-SOCIAL_AUTH_LOGIN_ERROR_URL = '/dashboard/'
\ No newline at end of file
+SOCIAL_AUTH_LOGIN_ERROR_URL = '/dashboard/'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{asctime} {levelname} {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'mentortyme.log.queue_handler',
+            'formatter': 'verbose',
+        },
+    },
+    'loggers': {
+        'user': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
+    },
+}
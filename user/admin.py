@@ -10,23 +10,34 @@ class UserAdmin(admin.ModelAdmin):
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role', 'slug')
     list_filter = ('role',)
+    list_select_related = ('user',)
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ('title', 'mentor', 'price', 'duration', 'is_active')
     list_filter = ('is_active',)
+    list_select_related = ('mentor__user',)
 
 @admin.register(WorkingHour)
 class WorkingHourAdmin(admin.ModelAdmin):
     list_display = ('mentor', 'day_of_week', 'start_time', 'end_time')
     list_filter = ('day_of_week',)
+    list_select_related = ('mentor__user',)
+
+    def delete_queryset(self, request, queryset):
+        mentor_ids = set(queryset.values_list('mentor_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for mentor in Profile.objects.filter(id__in=mentor_ids):
+            mentor.update_working_hours()
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('id', 'mentor', 'client', 'service', 'start_time', 'status')
     list_filter = ('status', 'start_time')
     readonly_fields = ('price_at_booking',)
+    list_select_related = ('mentor__user', 'client__user', 'service')
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('booking', 'rating', 'created_at')
+    list_select_related = ('booking__mentor__user', 'booking__client__user')
@@ -2,9 +2,12 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 from .models import Profile, Service, Review
+from .utils import compress_avatar
 
 User = get_user_model()
 
+RATING_CHOICES = tuple((i, f'{i} ⭐') for i in range(5, 0, -1))
+
 class CustomUserCreationForm(UserCreationForm):
     """Registration form with additional fields (first name, last name, email)"""
 
@@ -106,7 +109,7 @@ class ProfileUpdateForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         if self.instance and self.instance.pk:
-            if self.instance.role == 'client':
+            if self.instance.role == Profile.Role.CLIENT:
                 if 'position' in self.fields:
                     del self.fields['position']
 
@@ -117,6 +120,13 @@ class ProfileUpdateForm(forms.ModelForm):
                 self.fields['bio'].label = "Біографія (те, що побачать клієнти)"
                 self.fields['bio'].help_text = "Це перше, що прочитає ваш потенційний учень."
 
+    def clean_avatar(self):
+        """New uploads are downscaled and stored as WebP"""
+        avatar = self.cleaned_data.get('avatar')
+        if avatar and 'avatar' in self.changed_data:
+            return compress_avatar(avatar)
+        return avatar
+
 
 class ServiceForm(forms.ModelForm):
     """Form for creating/editing a mentor service"""
@@ -177,7 +187,7 @@ class ReviewForm(forms.ModelForm):
         widgets = {
             'rating': forms.Select(
                 attrs={'class': 'form-select'},
-                choices=[(i, f'{i} ⭐') for i in range(5, 0, -1)]
+                choices=RATING_CHOICES
             ),
 
             'comment': forms.Textarea(attrs={
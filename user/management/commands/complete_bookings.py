@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from user.models import Booking
+
+
+class Command(BaseCommand):
+    """
+    Periodic sweep of finished bookings to the ‘completed’ status
+    Meant to be run by cron, e.g. every minute:
+    * * * * * python manage.py complete_bookings
+    """
+    help = "Позначає завершені підтверджені бронювання як ‘completed’"
+
+    def handle(self, *args, **options):
+        count = Booking.complete_finished()
+        self.stdout.write(f"Completed bookings: {count}")
@@ -0,0 +1,31 @@
+from django.utils.functional import SimpleLazyObject
+
+
+class SlugProfileCacheMiddleware:
+    """
+    Per-request cache of profiles resolved by slug
+    Repeated lookups of the same profile within one request reuse the instance
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile_by_slug = {}
+        return self.get_response(request)
+
+
+class CurrentProfileMiddleware:
+    """
+    Lazy request.profile for the logged-in user (None for anonymous users)
+    Loaded on first access and shared with request.user.profile
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(
+            lambda: request.user.profile if request.user.is_authenticated else None
+        )
+        return self.get_response(request)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-15 20:56
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def fill_ratings(apps, schema_editor):
+    Profile = apps.get_model('user', 'Profile')
+    stats = Profile.objects.annotate(
+        avg=Avg('mentor_bookings__review__rating'),
+        count=Count('mentor_bookings__review')
+    ).filter(count__gt=0)
+
+    for profile in stats:
+        Profile.objects.filter(pk=profile.pk).update(
+            rating_avg=round(profile.avg, 2),
+            rating_count=profile.count
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0009_alter_booking_client_google_event_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='rating_avg',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Середній рейтинг (оновлюється при зміні відгуків)', max_digits=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Кількість відгуків'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-15 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0010_profile_rating_avg_profile_rating_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['mentor', 'start_time'], name='booking_mentor_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['client', 'status'], name='booking_client_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['mentor', 'status', 'start_time'], name='booking_mentor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workinghour',
+            index=models.Index(fields=['mentor', 'day_of_week'], name='workinghour_mentor_day_idx'),
+        ),
+    ]
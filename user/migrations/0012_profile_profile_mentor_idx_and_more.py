@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-15 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0011_booking_booking_mentor_start_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(condition=models.Q(('role', 'mentor')), fields=['id'], name='profile_mentor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['mentor'], name='svc_active_by_mentor'),
+        ),
+    ]
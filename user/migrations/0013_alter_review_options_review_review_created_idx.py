@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-15 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0012_profile_profile_mentor_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created_at'], include=('rating',), name='review_created_idx'),
+        ),
+    ]
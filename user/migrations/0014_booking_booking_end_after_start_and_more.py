@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-15 20:59
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def cancel_double_bookings(apps, schema_editor):
+    # Before this constraint nothing stopped two confirmed bookings of the same mentor slot;
+    # the earliest one keeps the slot, the rest are cancelled
+    Booking = apps.get_model('user', 'Booking')
+    earlier = Booking.objects.filter(
+        status='confirmed',
+        mentor=OuterRef('mentor'),
+        start_time=OuterRef('start_time'),
+        id__lt=OuterRef('id')
+    )
+    Booking.objects.filter(status='confirmed').filter(Exists(earlier)).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0013_alter_review_options_review_review_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(condition=models.Q(('end_time__gt', models.F('start_time'))), name='booking_end_after_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'confirmed')), fields=('mentor', 'start_time'), name='booking_unique_mentor_slot'),
+        ),
+    ]
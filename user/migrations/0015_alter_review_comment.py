@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-15 21:00
+
+from django.db import migrations, models
+from django.db.models.functions import Length, Substr
+
+
+def truncate_long_comments(apps, schema_editor):
+    Review = apps.get_model('user', 'Review')
+    Review.objects.annotate(
+        comment_length=Length('comment')
+    ).filter(comment_length__gt=500).update(comment=Substr('comment', 1, 500))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0014_booking_booking_end_after_start_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(truncate_long_comments, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='review',
+            name='comment',
+            field=models.CharField(max_length=500, verbose_name='Коментар'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-15 21:09
+
+from django.db import migrations, models
+
+
+def fill_google_oauth(apps, schema_editor):
+    Profile = apps.get_model('user', 'Profile')
+    UserSocialAuth = apps.get_model('social_django', 'UserSocialAuth')
+    connected = UserSocialAuth.objects.filter(provider='google-oauth2').values('user_id')
+    Profile.objects.filter(user_id__in=connected).update(has_google_oauth=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0016_booking_client_start_status_end_indexes'),
+        ('social_django', '0017_usersocialauth_user_social_auth_uid_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='has_google_oauth',
+            field=models.BooleanField(default=False, editable=False, help_text='Google Calendar підключено (оновлюється при зміні OAuth-акаунтів)'),
+        ),
+        migrations.RunPython(fill_google_oauth, migrations.RunPython.noop),
+    ]
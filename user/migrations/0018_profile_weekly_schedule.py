@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-15 21:12
+
+from django.db import migrations, models
+
+
+def fill_weekly_schedule(apps, schema_editor):
+    Profile = apps.get_model('user', 'Profile')
+    WorkingHour = apps.get_model('user', 'WorkingHour')
+
+    schedules = {}
+    for mentor_id, day, start, end in WorkingHour.objects.values_list(
+        'mentor_id', 'day_of_week', 'start_time', 'end_time'
+    ):
+        schedules.setdefault(mentor_id, {})[str(day)] = [
+            start.hour * 60 + start.minute,
+            end.hour * 60 + end.minute
+        ]
+
+    for mentor_id, schedule in schedules.items():
+        Profile.objects.filter(pk=mentor_id).update(weekly_schedule=schedule)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0017_profile_has_google_oauth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='weekly_schedule',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Графік по днях тижня у хвилинах від півночі (копія WorkingHour)'),
+        ),
+        migrations.RunPython(fill_weekly_schedule, migrations.RunPython.noop),
+    ]
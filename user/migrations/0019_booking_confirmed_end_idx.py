@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-15 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0018_profile_weekly_schedule'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_status_end_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'confirmed')), fields=['end_time'], name='booking_confirmed_end_idx'),
+        ),
+    ]
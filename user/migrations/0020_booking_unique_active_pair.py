@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-15 21:19
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+
+def resolve_active_pairs(apps, schema_editor):
+    Booking = apps.get_model('user', 'Booking')
+
+    # Lessons that have already ended no longer hold the pair (same rule as Booking.complete_finished)
+    Booking.objects.filter(status='confirmed', end_time__lte=timezone.now()).update(status='completed')
+
+    # Nothing stopped a client from holding several upcoming bookings with one mentor;
+    # the earliest one stays active, the rest are cancelled
+    earlier = Booking.objects.filter(
+        status='confirmed',
+        client=OuterRef('client'),
+        mentor=OuterRef('mentor')
+    ).filter(
+        models.Q(start_time__lt=OuterRef('start_time'))
+        | models.Q(start_time=OuterRef('start_time'), id__lt=OuterRef('id'))
+    )
+    Booking.objects.filter(status='confirmed').filter(Exists(earlier)).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0019_booking_confirmed_end_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_active_pairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'confirmed')), fields=('client', 'mentor'), name='booking_unique_active_pair'),
+        ),
+    ]
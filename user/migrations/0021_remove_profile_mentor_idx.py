@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-15 21:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0020_booking_unique_active_pair'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='profile',
+            name='profile_mentor_idx',
+        ),
+    ]
@@ -1,8 +1,16 @@
 from django.db import models
-from django.db.models import Avg
+from django.db.models import Avg, Count, F, Q
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def _make_slug(first_name, last_name, username):
+    """Slug from the full name, falling back to the username"""
+    return slugify(first_name + " " + last_name) or slugify(username)
 
 
 class User(AbstractUser):
@@ -14,16 +22,14 @@ class Profile(models.Model):
     User profile with role (client or mentor)
     Contains additional information: avatar, bio, age, gender, city, position
     """
-    ROLE_CHOICES = (
-        ('client', 'Клієнт'),
-        ('mentor', 'Ментор'),
-    )
+    class Role(models.TextChoices):
+        CLIENT = 'client', 'Клієнт'
+        MENTOR = 'mentor', 'Ментор'
 
-    GENDER_CHOICES = (
-        ('male', 'Чоловік'),
-        ('female', 'Жінка'),
-        ('other', 'Стать не вказана'),
-    )
+    class Gender(models.TextChoices):
+        MALE = 'male', 'Чоловік'
+        FEMALE = 'female', 'Жінка'
+        OTHER = 'other', 'Стать не вказана'
 
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
@@ -32,8 +38,8 @@ class Profile(models.Model):
     )
     role = models.CharField(
         max_length=10,
-        choices=ROLE_CHOICES,
-        default='client'
+        choices=Role.choices,
+        default=Role.CLIENT
     )
 
     avatar = models.ImageField(
@@ -55,7 +61,7 @@ class Profile(models.Model):
     )
     gender = models.CharField(
         max_length=10,
-        choices=GENDER_CHOICES,
+        choices=Gender.choices,
         blank=True,
         null=True,
         verbose_name="Стать"
@@ -76,24 +82,74 @@ class Profile(models.Model):
 
     slug = models.SlugField(unique=True, blank=True, null=True)
 
+    rating_avg = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Середній рейтинг (оновлюється при зміні відгуків)"
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Кількість відгуків"
+    )
+    has_google_oauth = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Google Calendar підключено (оновлюється при зміні OAuth-акаунтів)"
+    )
+    weekly_schedule = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Графік по днях тижня у хвилинах від півночі (копія WorkingHour)"
+    )
+
     def save(self, *args, **kwargs):
-        """Automatic slug creation on save"""
-        if not self.slug:
-            base_slug = slugify(self.user.first_name + " " + self.user.last_name)
-            if not base_slug:
-                base_slug = slugify(self.user.username)
-            self.slug = base_slug
+        """Automatic slug creation on first save"""
+        if self._state.adding and not self.slug:
+            self.slug = _make_slug(self.user.first_name, self.user.last_name, self.user.username)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} Profile"
 
     def get_average_rating(self):
-        """Calculation of the average mentor rating"""
-        reviews = Review.objects.filter(booking__mentor=self)
-        if reviews.exists():
-            return round(reviews.aggregate(Avg('rating'))['rating__avg'], 1)
-        return None
+        """Average mentor rating (kept up to date by Review signals)"""
+        if self.rating_avg is None:
+            return None
+        return round(self.rating_avg, 1)
+
+    def update_rating(self):
+        """Recalculation of the cached average rating and review count"""
+        stats = Review.objects.filter(booking__mentor=self).aggregate(
+            avg=Avg('rating'),
+            count=Count('id')
+        )
+        self.rating_avg = round(stats['avg'], 2) if stats['avg'] is not None else None
+        self.rating_count = stats['count']
+        Profile.objects.filter(pk=self.pk).update(
+            rating_avg=self.rating_avg,
+            rating_count=self.rating_count
+        )
+
+    def update_working_hours(self):
+        """
+        Recalculation of the cached weekly schedule from WorkingHour rows
+        Format: {"<day_of_week>": [start_minutes, end_minutes]}
+        """
+        self.weekly_schedule = {
+            str(day): [start.hour * 60 + start.minute, end.hour * 60 + end.minute]
+            for day, start, end in WorkingHour.objects.filter(mentor=self).values_list(
+                'day_of_week', 'start_time', 'end_time'
+            )
+        }
+        Profile.objects.filter(pk=self.pk).update(weekly_schedule=self.weekly_schedule)
+
+        from .utils import invalidate_slots  # utils imports the models
+        invalidate_slots(self.pk)
 
 
 class Service(models.Model):
@@ -112,6 +168,11 @@ class Service(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['mentor'], condition=Q(is_active=True), name='svc_active_by_mentor'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.price} грн"
 
@@ -121,25 +182,29 @@ class WorkingHour(models.Model):
     Mentor's working hours for a specific day of the week
     Used to calculate available slots
     """
-    DAY_CHOICES = (
-        (0, 'Понеділок'),
-        (1, 'Вівторок'),
-        (2, 'Середа'),
-        (3, 'Четвер'),
-        (4, 'П\'ятниця'),
-        (5, 'Субота'),
-        (6, 'Неділя'),
-    )
+    class Day(models.IntegerChoices):
+        MONDAY = 0, 'Понеділок'
+        TUESDAY = 1, 'Вівторок'
+        WEDNESDAY = 2, 'Середа'
+        THURSDAY = 3, 'Четвер'
+        FRIDAY = 4, 'П\'ятниця'
+        SATURDAY = 5, 'Субота'
+        SUNDAY = 6, 'Неділя'
 
     mentor = models.ForeignKey(
         Profile,
         on_delete=models.CASCADE,
         related_name='working_hours'
     )
-    day_of_week = models.IntegerField(choices=DAY_CHOICES)
+    day_of_week = models.IntegerField(choices=Day.choices)
     start_time = models.TimeField()
     end_time = models.TimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['mentor', 'day_of_week'], name='workinghour_mentor_day_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_day_of_week_display()}: {self.start_time}-{self.end_time}"
 
@@ -149,11 +214,10 @@ class Booking(models.Model):
     Booking a session between a client and a mentor
     Contains information about the time, status, price, and link to Google Calendar
     """
-    STATUS_CHOICES = (
-        ('confirmed', 'Підтверджено'),
-        ('cancelled', 'Скасовано'),
-        ('completed', 'Завершено'),
-    )
+    class Status(models.TextChoices):
+        CONFIRMED = 'confirmed', 'Підтверджено'
+        CANCELLED = 'cancelled', 'Скасовано'
+        COMPLETED = 'completed', 'Завершено'
 
     client = models.ForeignKey(
         Profile,
@@ -176,8 +240,8 @@ class Booking(models.Model):
     end_time = models.DateTimeField()
     status = models.CharField(
         max_length=20,
-        choices=STATUS_CHOICES,
-        default='confirmed'
+        choices=Status.choices,
+        default=Status.CONFIRMED
     )
 
     google_event_id = models.CharField(
@@ -206,12 +270,50 @@ class Booking(models.Model):
         verbose_name="Контакти або примітка"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['mentor', 'start_time'], name='booking_mentor_start_idx'),
+            models.Index(fields=['client', 'start_time', 'status'], name='booking_client_start_idx'),
+            models.Index(fields=['mentor', 'status', 'start_time'], name='booking_mentor_status_idx'),
+            models.Index(fields=['end_time'], condition=Q(status='confirmed'), name='booking_confirmed_end_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(end_time__gt=F('start_time')),
+                name='booking_end_after_start'
+            ),
+            models.UniqueConstraint(
+                fields=['mentor', 'start_time'],
+                condition=Q(status='confirmed'),
+                name='booking_unique_mentor_slot'
+            ),
+            models.UniqueConstraint(
+                fields=['client', 'mentor'],
+                condition=Q(status='confirmed'),
+                name='booking_unique_active_pair'
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         """Automatic price saving when creating"""
         if not self.price_at_booking and self.service:
             self.price_at_booking = self.service.price
         super().save(*args, **kwargs)
 
+    @classmethod
+    def complete_finished(cls, queryset=None, now=None):
+        """
+        Marking confirmed bookings that have already ended as completed
+        A single UPDATE over booking_confirmed_end_idx; returns the number of rows
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        return queryset.filter(
+            status=cls.Status.CONFIRMED,
+            end_time__lt=now or timezone.now()
+        ).update(status=cls.Status.COMPLETED)
+
     def __str__(self):
         return f"Booking {self.id}"
 
@@ -221,17 +323,25 @@ class Review(models.Model):
     Customer feedback on the lesson
     One review per booking (OneToOne)
     """
+    RATING_CHOICES = [(i, i) for i in range(1, 6)]
+
     booking = models.OneToOneField(
         Booking,
         on_delete=models.CASCADE,
         related_name='review'
     )
     rating = models.PositiveIntegerField(
-        choices=[(i, i) for i in range(1, 6)],
+        choices=RATING_CHOICES,
         verbose_name="Оцінка (1-5)"
     )
-    comment = models.TextField(verbose_name="Коментар")
+    comment = models.CharField(max_length=500, verbose_name="Коментар")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], include=['rating'], name='review_created_idx'),
+        ]
+
     def __str__(self):
         return f"Review for Booking {self.booking.id} - {self.rating}★"
\ No newline at end of file
@@ -1,7 +1,14 @@
-from django.db.models.signals import post_save
+from functools import partial
+from django.db.models.signals import post_save, post_delete
+from django.db.models import QuerySet
 from django.dispatch import receiver
 from django.conf import settings
-from .models import Profile
+from django.db import transaction
+from django.utils import timezone
+from social_django.models import UserSocialAuth
+from .models import Booking, Profile, Review, Service, WorkingHour
+from .tasks import cancel_calendar_events, enqueue
+from .utils import invalidate_mentor_profile, invalidate_slots
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -9,5 +16,91 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
+    # Partial saves (last_login on sign-in, profile_settings) leave the profile row alone
+    if update_fields is not None:
+        if {'first_name', 'last_name'} & set(update_fields):
+            invalidate_mentor_profile(instance.profile.slug)
+        return
+    instance.profile.save()
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_mentor_rating(sender, instance, **kwargs):
+    mentor = Profile.objects.filter(mentor_bookings__id=instance.booking_id).first()
+    if mentor:
+        mentor.update_rating()
+        invalidate_mentor_profile(mentor.slug)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    invalidate_mentor_profile(instance.slug)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_service_mentor_cache(sender, instance, **kwargs):
+    if Service.mentor.is_cached(instance):
+        slug = instance.mentor.slug
+    else:
+        slug = Profile.objects.filter(pk=instance.mentor_id).values_list('slug', flat=True).first()
+    invalidate_mentor_profile(slug)
+
+@receiver(post_save, sender=WorkingHour)
+@receiver(post_delete, sender=WorkingHour)
+def update_mentor_working_hours(sender, instance, origin=None, **kwargs):
+    # QuerySet deletes (schedule_settings, admin bulk action) refresh the schedule once themselves
+    if isinstance(origin, QuerySet):
+        return
+
+    if WorkingHour.mentor.is_cached(instance):
+        mentor = instance.mentor
+    else:
+        mentor = Profile.objects.filter(pk=instance.mentor_id).first()
+    if mentor:
+        mentor.update_working_hours()
+
+
+@receiver(post_save, sender=UserSocialAuth)
+@receiver(post_delete, sender=UserSocialAuth)
+def update_google_oauth_flag(sender, instance, **kwargs):
+    if instance.provider != 'google-oauth2':
+        return
+
+    connected = UserSocialAuth.objects.filter(
+        user_id=instance.user_id,
+        provider='google-oauth2'
+    ).exists()
+    Profile.objects.filter(user_id=instance.user_id).update(has_google_oauth=connected)
+
+    # Keep an already loaded profile in sync, otherwise save_user_profile would write the old value back
+    if UserSocialAuth.user.is_cached(instance):
+        user = instance.user
+        if type(user).profile.is_cached(user):
+            user.profile.has_google_oauth = connected
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_slots(sender, instance, **kwargs):
+    """Retiring the mentor's cached slots once a booking is created, changed or removed"""
+    invalidate_slots(instance.mentor_id)
+
+
+@receiver(post_delete, sender=Booking)
+def delete_booking_calendar_events(sender, instance, **kwargs):
+    """Removing a deleted booking's Google Calendar events once the DELETE has committed"""
+    if not (instance.google_event_id or instance.client_google_event_id):
+        return
+
+    transaction.on_commit(partial(
+        enqueue,
+        cancel_calendar_events,
+        instance.mentor_id,
+        instance.google_event_id,
+        instance.client_id,
+        instance.client_google_event_id,
+        timezone.localtime(instance.start_time).date()
+    ))
@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import logging
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+from .models import Booking
+from .utils import (
+    create_google_event,
+    delete_google_events,
+    get_google_calendar_service,
+    invalidate_busy_periods,
+    run_in_parallel
+)
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='calendar-sync')
+
+
+def _run_in_background(task, *args):
+    try:
+        task(*args)
+    except Exception:
+        logger.exception("Calendar task %s%r failed", task.__name__, args)
+    finally:
+        connections.close_all()
+
+
+def enqueue(task, *args):
+    """
+    Running a Google Calendar task off the request path
+    With GOOGLE_CALENDAR_SYNC_IN_BACKGROUND = False the task runs synchronously
+    """
+    if getattr(settings, 'GOOGLE_CALENDAR_SYNC_IN_BACKGROUND', True):
+        _executor.submit(_run_in_background, task, *args)
+    else:
+        task(*args)
+
+
+def sync_booking_to_calendar(booking_id):
+    """
+    Creating events for a booking in the mentor's and client's Google Calendars
+    Stores the returned event ids on the booking
+    """
+    booking = Booking.objects.select_related(
+        'mentor__user', 'client__user', 'service'
+    ).prefetch_related(
+        'mentor__user__social_auth', 'client__user__social_auth'
+    ).filter(pk=booking_id).first()
+
+    if not booking or not booking.service:
+        return
+
+    mentor_user = booking.mentor.user
+    client_user = booking.client.user
+    service = booking.service
+    start_dt = timezone.localtime(booking.start_time)
+
+    client_email = client_user.email if client_user.email else "Email не вказано в профілі"
+
+    google_description = (
+        f"Клієнт: {client_user.first_name} {client_user.last_name}\n"
+        f"Email: {client_email}\n"
+        f"📞 {booking.note or ''}"
+    )
+
+    mentor_calendar = get_google_calendar_service(mentor_user)
+    client_calendar = get_google_calendar_service(client_user)
+
+    mentor_call = partial(
+        create_google_event,
+        mentor_user,
+        start_dt,
+        service.duration,
+        f"{service.title} - {client_user.first_name}",
+        description=google_description,
+        calendar_service=mentor_calendar
+    ) if mentor_calendar else None
+    client_call = partial(
+        create_google_event,
+        client_user,
+        start_dt,
+        service.duration,
+        f"{service.title} - {mentor_user.first_name}",
+        description=f"Ментор: {mentor_user.first_name}\nПослуга: {service.title}",
+        calendar_service=client_calendar
+    ) if client_calendar else None
+
+    if mentor_calendar is not None and mentor_calendar is client_calendar:
+        # Self-booking: both calls share one httplib2 client, which can't serve two threads at once
+        mentor_event_id, = run_in_parallel(mentor_call)
+        client_event_id, = run_in_parallel(client_call)
+    else:
+        mentor_event_id, client_event_id = run_in_parallel(mentor_call, client_call)
+
+    if not (mentor_event_id or client_event_id):
+        return
+
+    updated = Booking.objects.filter(pk=booking_id).update(
+        google_event_id=mentor_event_id,
+        client_google_event_id=client_event_id
+    )
+    if not updated:
+        # Cancelled while the events were being created: post_delete saw no ids, so clean up here
+        delete_google_events([
+            (calendar, event_id)
+            for calendar, event_id in ((mentor_calendar, mentor_event_id), (client_calendar, client_event_id))
+            if event_id
+        ])
+
+
+def cancel_calendar_events(mentor_id, mentor_event_id, client_id, client_event_id, event_date):
+    """
+    Deleting a cancelled booking's events from both Google Calendars
+    mentor_id and client_id are Profile ids; profiles deleted meanwhile are skipped
+    """
+    users = {
+        user.profile.id: user
+        for user in User.objects.select_related('profile').prefetch_related(
+            'social_auth'
+        ).filter(profile__id__in=[mentor_id, client_id])
+    }
+
+    deletions = []
+    for profile_id, event_id in ((mentor_id, mentor_event_id), (client_id, client_event_id)):
+        user = users.get(profile_id)
+        calendar = get_google_calendar_service(user) if user and event_id else None
+        if calendar:
+            deletions.append((calendar, event_id))
+
+    delete_google_events(deletions)
+
+    for user in users.values():
+        invalidate_busy_periods(user.id, event_date)
@@ -0,0 +1,27 @@
+import pytest
+from io import BytesIO
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from user.forms import ProfileUpdateForm
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+def test_profile_form_compresses_oversized_avatar():
+    """Перевіряє, що завелике фото зменшується до 512px і зберігається як WebP"""
+    profile = User.objects.create_user(username='avatar_client').profile
+
+    buffer = BytesIO()
+    Image.new('RGB', (2000, 1000), 'teal').save(buffer, format='PNG')
+    upload = SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+
+    form = ProfileUpdateForm({'bio': ''}, {'avatar': upload}, instance=profile)
+    assert form.is_valid(), form.errors
+
+    avatar = form.cleaned_data['avatar']
+    assert avatar.name == 'photo.webp'
+    with Image.open(avatar) as image:
+        assert image.format == 'WEBP'
+        assert image.size == (512, 256)
@@ -0,0 +1,68 @@
+import datetime
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from user.models import Booking, Service
+from user.tasks import sync_booking_to_calendar
+
+User = get_user_model()
+
+
+@pytest.fixture
+def calendars(monkeypatch):
+    """Окремий фейковий клієнт календаря на кожного користувача та журнал видалень"""
+    clients = {}
+    deleted = []
+    monkeypatch.setattr('user.tasks.get_google_calendar_service', lambda user: clients.setdefault(user.id, object()))
+    monkeypatch.setattr('user.tasks.delete_google_events', deleted.extend)
+    return clients, deleted
+
+
+@pytest.fixture
+def booking(db):
+    mentor = User.objects.create_user(username='task_mentor').profile
+    client_profile = User.objects.create_user(username='task_client').profile
+    service = Service.objects.create(mentor=mentor, title='Code review', duration=60, price=300)
+    start = timezone.now() + datetime.timedelta(days=1)
+    return Booking.objects.create(
+        client=client_profile, mentor=mentor, service=service,
+        start_time=start, end_time=start + datetime.timedelta(hours=1)
+    )
+
+
+def test_sync_deletes_events_when_booking_cancelled_meanwhile(booking, calendars, monkeypatch):
+    """Перевіряє, що створені події видаляються, якщо бронювання скасували під час синхронізації"""
+    clients, deleted = calendars
+
+    def create_events_while_cancelled(*calls):
+        Booking.objects.filter(pk=booking.pk).delete()
+        return ['mentor-event', 'client-event']
+
+    monkeypatch.setattr('user.tasks.run_in_parallel', create_events_while_cancelled)
+
+    sync_booking_to_calendar(booking.id)
+
+    assert deleted == [
+        (clients[booking.mentor.user_id], 'mentor-event'),
+        (clients[booking.client.user_id], 'client-event'),
+    ]
+
+
+def test_cancelled_booking_events_deleted_after_commit(client, booking, calendars, settings, django_capture_on_commit_callbacks):
+    """Перевіряє, що post_delete після коміту видаляє події з обох календарів"""
+    settings.GOOGLE_CALENDAR_SYNC_IN_BACKGROUND = False
+    clients, deleted = calendars
+    Booking.objects.filter(pk=booking.pk).update(google_event_id='mentor-event', client_google_event_id='client-event')
+
+    client.force_login(booking.client.user)
+    with django_capture_on_commit_callbacks() as callbacks:
+        client.post(reverse('cancel_booking', args=[booking.id]))
+        assert deleted == []
+
+    for callback in callbacks:
+        callback()
+    assert deleted == [
+        (clients[booking.mentor.user_id], 'mentor-event'),
+        (clients[booking.client.user_id], 'client-event'),
+    ]
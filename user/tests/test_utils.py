@@ -0,0 +1,204 @@
+import datetime
+import logging
+import random
+import threading
+import time
+import httplib2
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connections
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+from social_django.models import UserSocialAuth
+from user.utils import (
+    GOOGLE_DELETE_ATTEMPTS,
+    delete_google_events,
+    iter_free_slots,
+    merge_intervals,
+    refresh_credentials,
+    token_expiry
+)
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'')
+
+
+class FakeCalendar:
+    """Calendar client whose batch answers every event id from a list of statuses per attempt"""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.batches = []
+
+    def events(self):
+        return self
+
+    def delete(self, calendarId, eventId):
+        return eventId
+
+    def new_batch_http_request(self, callback):
+        calendar = self
+
+        class Batch:
+            def __init__(self):
+                self.requests = []
+
+            def add(self, request, request_id):
+                self.requests.append((request_id, request))
+
+            def execute(self):
+                calendar.batches.append([event_id for _, event_id in self.requests])
+                for request_id, event_id in self.requests:
+                    status = calendar.statuses[event_id].pop(0)
+                    callback(request_id, None, http_error(status) if status else None)
+
+        return Batch()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr('user.utils.time.sleep', calls.append)
+    return calls
+
+
+def test_delete_google_events_ignores_already_deleted(sleeps, caplog):
+    """Перевіряє, що 404/410 вважаються видаленими подіями без повторів і помилок"""
+    calendar = FakeCalendar({'gone': [404], 'deleted': [410], 'ok': [None]})
+
+    delete_google_events([(calendar, 'gone'), (calendar, 'deleted'), (calendar, 'ok')])
+
+    assert calendar.batches == [['gone', 'deleted', 'ok']]
+    assert sleeps == []
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+def test_delete_google_events_retries_server_errors(sleeps):
+    """Перевіряє, що 429/5xx повторюються з паузою лише для невдалих подій"""
+    calendar = FakeCalendar({'busy': [503, 429, None], 'ok': [None]})
+
+    delete_google_events([(calendar, 'busy'), (calendar, 'ok')])
+
+    assert calendar.batches == [['busy', 'ok'], ['busy'], ['busy']]
+    assert sleeps == [2, 4]
+
+
+def test_delete_google_events_gives_up_after_all_attempts(sleeps, caplog):
+    """Перевіряє, що після вичерпання спроб видалення припиняється з помилкою в журналі"""
+    calendar = FakeCalendar({'down': [500] * GOOGLE_DELETE_ATTEMPTS, 'denied': [403]})
+
+    delete_google_events([(calendar, 'down'), (calendar, 'denied')])
+
+    assert len(calendar.batches) == GOOGLE_DELETE_ATTEMPTS
+    assert calendar.batches[1:] == [['down']] * (GOOGLE_DELETE_ATTEMPTS - 1)
+    messages = [r.getMessage() for r in caplog.records if r.levelno >= logging.ERROR]
+    assert any('403' in m for m in messages)
+    assert any(m.startswith('Gave up deleting 1 Google events') for m in messages)
+
+
+def expired_credentials(social_auth):
+    return Credentials(
+        token=social_auth.extra_data['access_token'],
+        refresh_token='refresh',
+        expiry=datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+    )
+
+
+@pytest.fixture
+def google_refresh(monkeypatch):
+    """Фейкове оновлення токена: кожен виклик видає новий токен на годину"""
+    calls = []
+
+    def refresh(creds, request):
+        time.sleep(0.05)
+        calls.append(creds)
+        creds.token = f'fresh-{len(calls)}'
+        creds.expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    monkeypatch.setattr(Credentials, 'refresh', refresh)
+    return calls
+
+
+def make_social_auth(username):
+    user = get_user_model().objects.create_user(username=username)
+    return UserSocialAuth.objects.create(
+        user=user, provider='google-oauth2', uid=username,
+        extra_data={'access_token': 'stale', 'auth_time': 0, 'expires': 3600, 'refresh_token': 'refresh'}
+    )
+
+
+@pytest.mark.django_db
+def test_refresh_credentials_saves_token(google_refresh):
+    """Перевіряє, що оновлений токен записується в extra_data"""
+    social_auth = make_social_auth('refresh_user')
+    creds = expired_credentials(social_auth)
+
+    refresh_credentials(social_auth, creds)
+
+    social_auth.refresh_from_db()
+    assert social_auth.extra_data['access_token'] == 'fresh-1'
+    assert not creds.expired
+    assert token_expiry(social_auth.extra_data) > datetime.datetime.utcnow()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_refresh_credentials_refreshes_once_per_user(google_refresh):
+    """Перевіряє, що паралельні потоки оновлюють токен одного користувача лише один раз"""
+    social_auth = make_social_auth('locked_user')
+    results = []
+
+    def worker():
+        try:
+            own = UserSocialAuth.objects.get(pk=social_auth.pk)
+            creds = expired_credentials(own)
+            refresh_credentials(own, creds)
+            results.append(creds.token)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(google_refresh) == 1
+    assert results == ['fresh-1'] * 3
+
+
+def reference_slots(date_obj, work_start, work_end, busy, duration):
+    """Попередній алгоритм: сітка слотів на datetime і лінійна перевірка кожного на перетин"""
+    midnight = datetime.datetime.combine(date_obj, datetime.time.min)
+    to_dt = lambda minutes: midnight + datetime.timedelta(minutes=minutes)
+    intervals = [{'start': to_dt(start), 'end': to_dt(end)} for start, end in busy]
+
+    slots = []
+    current = to_dt(work_start)
+    while current + datetime.timedelta(minutes=duration) <= to_dt(work_end):
+        slot_end = current + datetime.timedelta(minutes=duration)
+        if not any(current < b['end'] and slot_end > b['start'] for b in intervals):
+            slots.append(current.strftime('%H:%M'))
+        current += datetime.timedelta(minutes=duration + 15)
+    return slots
+
+
+def test_free_slots_match_previous_algorithm():
+    """Перевіряє на випадкових графіках, що злиття інтервалів і прохід по проміжках дають ті самі слоти"""
+    rng = random.Random(20261015)
+    date_obj = datetime.date(2026, 6, 3)
+
+    for _ in range(2000):
+        work_start = rng.randrange(0, 12 * 60)
+        work_end = rng.randrange(work_start, 24 * 60 + 1)
+        duration = rng.choice((15, 30, 45, 60, 90, 120))
+        busy = []
+        for _ in range(rng.randrange(0, 8)):
+            start = rng.randrange(0, 24 * 60)
+            busy.append((start, start + rng.randrange(1, 180)))
+
+        slots = [
+            f'{slot // 60:02d}:{slot % 60:02d}'
+            for slot in iter_free_slots(work_start, work_end, merge_intervals(sorted(busy)), duration, duration + 15)
+        ]
+        assert slots == reference_slots(date_obj, work_start, work_end, busy, duration), (work_start, work_end, duration, busy)
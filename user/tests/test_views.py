@@ -1,13 +1,27 @@
 import pytest
 import datetime
+from io import StringIO
+from zoneinfo import ZoneInfo
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from user.models import WorkingHour
-from user.utils import get_available_slots
+from django.utils import timezone
+from social_django.models import UserSocialAuth
+from user.models import WorkingHour, Booking, Profile, Review, Service
+from user.utils import get_available_slots, mentor_profile_cache_key
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш LocMem живе між тестами, а id та slug після відкату можуть повторюватися"""
+    cache.clear()
+
+
 @pytest.mark.django_db
 def test_home_view_returns_200(client):
     """Перевіряє, що головна сторінка успішно завантажується"""
@@ -43,4 +57,462 @@ def test_get_available_slots_logic():
     slots = get_available_slots(mentor_user, test_date, duration_minutes=60)
 
     assert len(slots) == 1
-    assert slots[0] == '09:00'
\ No newline at end of file
+    assert slots[0] == '09:00'
+
+@pytest.mark.django_db
+def test_mentor_profile_shows_average_rating(client):
+    """Перевіряє, що рейтинг ментора оновлюється після відгуків і показується на сторінці"""
+    mentor_user = User.objects.create_user(username='rated_mentor', first_name='Olena')
+    mentor = mentor_user.profile
+    mentor.role = 'mentor'
+    mentor.save()
+
+    client_profile = User.objects.create_user(username='rating_client').profile
+    start = timezone.now() - datetime.timedelta(days=1)
+
+    for rating in (4, 5):
+        booking = Booking.objects.create(
+            client=client_profile,
+            mentor=mentor,
+            start_time=start,
+            end_time=start + datetime.timedelta(hours=1),
+            status='completed'
+        )
+        Review.objects.create(booking=booking, rating=rating, comment='Добре')
+
+    mentor.refresh_from_db()
+    assert mentor.rating_count == 2
+    assert mentor.get_average_rating() == 4.5
+
+    response = client.get(reverse('mentor_profile', args=[mentor.slug]))
+    assert response.status_code == 200
+    assert '4.5' in response.content.decode()
+
+
+
+@pytest.mark.django_db
+def test_mentor_profile_is_cached(client):
+    """Перевіряє, що профіль ментора береться з кешу, а зміна послуг скидає кеш"""
+    mentor = User.objects.create_user(username='cached_mentor', first_name='Ivan').profile
+    mentor.role = 'mentor'
+    mentor.save()
+    url = reverse('mentor_profile', args=[mentor.slug])
+
+    client.get(url)
+    cached = cache.get(mentor_profile_cache_key(mentor.slug))
+    assert cached.user.get_deferred_fields() >= {'password', 'email'}
+    # Оновлення через queryset оминає сигнали, тож сторінка показує закешовану версію
+    Profile.objects.filter(pk=mentor.pk).update(city='Львів')
+    assert 'Львів' not in client.get(url).content.decode()
+
+    Service.objects.create(mentor=mentor, title='Code review', duration=30, price=300)
+    content = client.get(url).content.decode()
+    assert 'Code review' in content
+    assert 'Львів' in content
+
+
+@pytest.mark.django_db
+def test_dashboard_renders_bookings(client, django_assert_num_queries):
+    """Перевіряє, що кабінет показує активні заняття та історію з відгуками"""
+    mentor = User.objects.create_user(username='dash_mentor', first_name='Taras').profile
+    mentor.role = 'mentor'
+    mentor.save()
+
+    client_user = User.objects.create_user(username='dash_client', first_name='Anna', email='anna@example.com')
+    service = Service.objects.create(mentor=mentor, title='Python 101', duration=60, price=500)
+    now = timezone.now()
+
+    past = Booking.objects.create(
+        client=User.objects.create_user(username='dash_past_client').profile,
+        mentor=mentor,
+        service=service,
+        start_time=now - datetime.timedelta(days=2),
+        end_time=now - datetime.timedelta(days=2) + datetime.timedelta(hours=1)
+    )
+    Review.objects.create(booking=past, rating=5, comment='Супер')
+
+    Booking.objects.create(
+        client=client_user.profile,
+        mentor=mentor,
+        service=service,
+        start_time=now + datetime.timedelta(days=2),
+        end_time=now + datetime.timedelta(days=2, hours=1),
+        note='Telegram: @anna'
+    )
+
+    client.force_login(mentor.user)
+    # Сесія, користувач, профіль, активні, дві історії: поля поза .only() дали б зайві запити
+    with django_assert_num_queries(6):
+        response = client.get(reverse('dashboard'))
+    content = response.content.decode()
+
+    assert response.status_code == 200
+    assert 'anna@example.com' in content
+    assert 'Telegram: @anna' in content
+    assert '⭐ 5' in content
+
+    call_command('complete_bookings', stdout=StringIO())
+    past.refresh_from_db()
+    assert past.status == 'completed'
+
+
+@pytest.fixture
+def slot_service(db):
+    """Послуга ментора з робочими годинами 10:00-13:00 у день 2099-06-03"""
+    mentor = User.objects.create_user(username='slot_mentor', first_name='Oleh').profile
+    mentor.role = 'mentor'
+    mentor.save()
+
+    WorkingHour.objects.create(
+        mentor=mentor,
+        day_of_week=datetime.date(2099, 6, 3).weekday(),
+        start_time=datetime.time(10, 0),
+        end_time=datetime.time(13, 0)
+    )
+    return Service.objects.create(mentor=mentor, title='Code review', duration=60, price=300)
+
+
+@pytest.mark.django_db
+def test_service_detail_rejects_taken_slot(client, slot_service):
+    """Перевіряє, що один і той самий слот не можна забронювати двічі"""
+    url = reverse('service_detail', args=[slot_service.id])
+
+    for username in ('first_client', 'second_client'):
+        client.force_login(User.objects.create_user(username=username))
+        client.post(url, {'date': '2099-06-03', 'time': '10:00'})
+
+    assert Booking.objects.filter(mentor=slot_service.mentor).count() == 1
+    assert Booking.objects.get(mentor=slot_service.mentor).client.user.username == 'first_client'
+
+
+@pytest.mark.django_db
+def test_service_detail_slots_cache_dropped_after_booking(client, slot_service):
+    """Перевіряє, що закешовані слоти скидаються після бронювання"""
+    url = reverse('service_detail', args=[slot_service.id])
+    client.force_login(User.objects.create_user(username='cache_client'))
+
+    assert '10:00' in client.get(url, {'date': '2099-06-03'}).context['slots']
+    client.post(url, {'date': '2099-06-03', 'time': '10:00'})
+    assert '10:00' not in client.get(url, {'date': '2099-06-03'}).context['slots']
+
+
+@pytest.mark.django_db
+def test_service_detail_slots_cache_dropped_after_schedule_change(client, slot_service):
+    """Перевіряє, що закешовані слоти скидаються після зміни графіка"""
+    url = reverse('service_detail', args=[slot_service.id])
+    day = datetime.date(2099, 6, 3).weekday()
+    client.force_login(slot_service.mentor.user)
+
+    assert client.get(url, {'date': '2099-06-03'}).context['slots'][0] == '10:00'
+    client.post(reverse('schedule_settings'), {
+        f'day_{day}_active': 'on', f'day_{day}_start': '11:00', f'day_{day}_end': '13:00',
+    })
+    assert client.get(url, {'date': '2099-06-03'}).context['slots'][0] == '11:00'
+
+
+@pytest.mark.django_db
+def test_service_detail_rejects_second_active_booking(client, slot_service):
+    """Перевіряє, що клієнт не може мати два активні записи до одного ментора"""
+    url = reverse('service_detail', args=[slot_service.id])
+    client.force_login(User.objects.create_user(username='pair_client'))
+
+    client.post(url, {'date': '2099-06-03', 'time': '10:00'})
+    response = client.post(url, {'date': '2099-06-04', 'time': '10:00'})
+
+    assert response.url == reverse('dashboard')
+    assert Booking.objects.filter(mentor=slot_service.mentor).count() == 1
+
+
+@pytest.mark.django_db
+def test_service_detail_completes_unswept_finished_lesson(client, slot_service):
+    """Перевіряє, що завершене, але ще не позначене як completed заняття не блокує новий запис"""
+    client_user = User.objects.create_user(username='retry_client')
+    past_start = timezone.now() - datetime.timedelta(days=1)
+    Booking.objects.create(
+        client=client_user.profile,
+        mentor=slot_service.mentor,
+        start_time=past_start,
+        end_time=past_start + datetime.timedelta(hours=1)
+    )
+
+    client.force_login(client_user)
+    client.post(reverse('service_detail', args=[slot_service.id]), {'date': '2099-06-04', 'time': '10:00'})
+
+    assert Booking.objects.filter(mentor=slot_service.mentor, status='confirmed').count() == 1
+    assert Booking.objects.filter(mentor=slot_service.mentor, status='completed').count() == 1
+
+
+@pytest.mark.django_db
+def test_get_available_slots_skips_booked_time():
+    """Перевіряє, що заброньований час ментора не потрапляє у вільні слоти"""
+    mentor_user = User.objects.create_user(username='busy_mentor', first_name='Iryna')
+    mentor = mentor_user.profile
+    mentor.role = 'mentor'
+    mentor.save()
+
+    WorkingHour.objects.create(
+        mentor=mentor,
+        day_of_week=2,
+        start_time=datetime.time(9, 0),
+        end_time=datetime.time(13, 0)
+    )
+
+    kyiv_tz = ZoneInfo('Europe/Kyiv')
+    booked_start = datetime.datetime(2026, 6, 3, 10, 15, tzinfo=kyiv_tz)
+    Booking.objects.create(
+        client=User.objects.create_user(username='busy_client').profile,
+        mentor=mentor,
+        start_time=booked_start,
+        end_time=booked_start + datetime.timedelta(hours=1)
+    )
+
+    slots = get_available_slots(mentor_user, datetime.date(2026, 6, 3), duration_minutes=60)
+
+    assert slots == ['09:00', '11:30']
+
+
+@pytest.mark.django_db
+def test_schedule_settings_updates_working_hours(client):
+    """Перевіряє створення, зміну та видалення робочих годин ментора"""
+    mentor = User.objects.create_user(username='schedule_mentor').profile
+    mentor.role = 'mentor'
+    mentor.save()
+
+    WorkingHour.objects.create(mentor=mentor, day_of_week=0, start_time=datetime.time(9, 0), end_time=datetime.time(18, 0))
+    WorkingHour.objects.create(mentor=mentor, day_of_week=1, start_time=datetime.time(9, 0), end_time=datetime.time(18, 0))
+
+    client.force_login(mentor.user)
+    response = client.post(reverse('schedule_settings'), {
+        'day_0_active': 'on', 'day_0_start': '10:00', 'day_0_end': '14:00',
+        'day_2_active': 'on', 'day_2_start': '12:00', 'day_2_end': '20:00',
+    })
+    assert response.status_code == 302
+
+    hours = {wh.day_of_week: (wh.start_time, wh.end_time) for wh in WorkingHour.objects.filter(mentor=mentor)}
+    assert hours == {
+        0: (datetime.time(10, 0), datetime.time(14, 0)),
+        2: (datetime.time(12, 0), datetime.time(20, 0)),
+    }
+
+    mentor.refresh_from_db()
+    assert mentor.weekly_schedule == {'0': [600, 840], '2': [720, 1200]}
+
+    response = client.get(reverse('schedule_settings'))
+    assert response.context['schedule'][0]['start'] == '10:00'
+    assert response.context['schedule'][1]['is_active'] is False
+
+
+@pytest.mark.django_db
+def test_google_oauth_flag_follows_social_auth():
+    """Перевіряє, що прапорець has_google_oauth оновлюється при підключенні та відключенні Google"""
+    user = User.objects.create_user(username='google_user')
+    social = UserSocialAuth.objects.create(user=user, provider='google-oauth2', uid='google_user@example.com')
+
+    user.save()
+    user.profile.refresh_from_db()
+    assert user.profile.has_google_oauth is True
+
+    social.delete()
+    user.profile.refresh_from_db()
+    assert user.profile.has_google_oauth is False
+
+
+@pytest.mark.django_db
+def test_dashboard_history_keyset_pages(client):
+    """Перевіряє посторінкову історію за курсором: вперед, назад і без повторів"""
+    mentor = User.objects.create_user(username='history_mentor').profile
+    client_profile = User.objects.create_user(username='history_client').profile
+    start = timezone.now() - datetime.timedelta(days=30)
+
+    for i in range(23):
+        Booking.objects.create(
+            client=client_profile,
+            mentor=mentor,
+            start_time=start + datetime.timedelta(days=i),
+            end_time=start + datetime.timedelta(days=i, hours=1),
+            status='completed'
+        )
+
+    client.force_login(client_profile.user)
+    pages = []
+    params = {}
+    while True:
+        page = client.get(reverse('dashboard'), params).context['client_history']
+        pages.append([booking.id for booking in page])
+        if not page.has_next:
+            break
+        params = {'client_before': page.next_cursor}
+
+    assert [len(ids) for ids in pages] == [10, 10, 3]
+    all_ids = [pk for ids in pages for pk in ids]
+    assert all_ids == list(Booking.objects.order_by('-start_time').values_list('id', flat=True))
+
+    previous = client.get(reverse('dashboard'), {'client_after': page.previous_cursor}).context['client_history']
+    assert [booking.id for booking in previous] == pages[1]
+    assert previous.has_previous and previous.has_next
+
+
+@pytest.mark.django_db
+def test_cancel_booking_deletes_future_booking_and_calendar_events(client, settings, monkeypatch, django_capture_on_commit_callbacks):
+    """Перевіряє, що скасовується лише майбутнє заняття, а події календаря видаляються після коміту"""
+    settings.GOOGLE_CALENDAR_SYNC_IN_BACKGROUND = False
+    calls = []
+    monkeypatch.setattr('user.signals.cancel_calendar_events', lambda *args: calls.append(args))
+
+    mentor = User.objects.create_user(username='cancel_mentor').profile
+    client_profile = User.objects.create_user(username='cancel_client').profile
+    past_start = timezone.now() - datetime.timedelta(days=1)
+    future_start = timezone.now() + datetime.timedelta(days=1)
+    past = Booking.objects.create(
+        client=client_profile, mentor=mentor, status='completed',
+        start_time=past_start, end_time=past_start + datetime.timedelta(hours=1)
+    )
+    future = Booking.objects.create(
+        client=client_profile, mentor=mentor, google_event_id='mentor-event',
+        start_time=future_start, end_time=future_start + datetime.timedelta(hours=1)
+    )
+
+    client.force_login(client_profile.user)
+    client.post(reverse('cancel_booking', args=[past.id]))
+    assert Booking.objects.filter(id=past.id).exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(reverse('cancel_booking', args=[future.id]))
+    assert not Booking.objects.filter(id=future.id).exists()
+    assert calls == [(mentor.id, 'mentor-event', client_profile.id, None, timezone.localtime(future_start).date())]
+
+    assert client.post(reverse('cancel_booking', args=[future.id])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_delete_service_checks_owner(client, django_assert_num_queries):
+    """Перевіряє, що ментор видаляє лише власну послугу, а бронювання зберігаються без неї"""
+    mentor = User.objects.create_user(username='svc_owner').profile
+    mentor.role = 'mentor'
+    mentor.save()
+    other = User.objects.create_user(username='svc_other').profile
+    other.role = 'mentor'
+    other.save()
+
+    service = Service.objects.create(mentor=mentor, title='Mock interview', duration=60, price=500)
+    start = timezone.now() - datetime.timedelta(days=1)
+    booking = Booking.objects.create(
+        client=other, mentor=mentor, service=service, status='completed',
+        start_time=start, end_time=start + datetime.timedelta(hours=1)
+    )
+    url = reverse('delete_service', args=[service.id])
+
+    client.force_login(other.user)
+    assert client.post(url).status_code == 404
+    assert Service.objects.filter(id=service.id).exists()
+
+    client.force_login(mentor.user)
+    assert client.post(reverse('delete_service', args=[service.id + 1000])).status_code == 404
+
+    # Сесія, користувач, профіль, послуга зі slug ментора, SET NULL у бронюваннях, DELETE
+    with django_assert_num_queries(6):
+        response = client.post(url)
+    assert response.url == reverse('my_services')
+    assert not Service.objects.filter(id=service.id).exists()
+    booking.refresh_from_db()
+    assert booking.service_id is None
+
+
+@pytest.mark.django_db
+def test_mentor_profile_hides_book_button_with_active_booking(client):
+    """Перевіряє, що клієнт з активним записом бачить посилання на кабінет замість бронювання"""
+    mentor = User.objects.create_user(username='active_mentor').profile
+    mentor.role = 'mentor'
+    mentor.save()
+    Service.objects.create(mentor=mentor, title='Code review', duration=30, price=300)
+    client_profile = User.objects.create_user(username='active_client').profile
+    url = reverse('mentor_profile', args=[mentor.slug])
+
+    client.force_login(client_profile.user)
+    assert 'У вас вже є активне бронювання' not in client.get(url).content.decode()
+
+    start = timezone.now() + datetime.timedelta(days=1)
+    Booking.objects.create(client=client_profile, mentor=mentor, start_time=start, end_time=start + datetime.timedelta(hours=1))
+    assert 'У вас вже є активне бронювання' in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_finished_lesson_does_not_count_as_active(client):
+    """Перевіряє, що завершене, але ще не позначене як completed заняття не ховає кнопку"""
+    mentor = User.objects.create_user(username='finished_mentor').profile
+    mentor.role = 'mentor'
+    mentor.save()
+    Service.objects.create(mentor=mentor, title='Code review', duration=30, price=300)
+    client_profile = User.objects.create_user(username='finished_client').profile
+
+    start = timezone.now() - datetime.timedelta(hours=2)
+    Booking.objects.create(client=client_profile, mentor=mentor, start_time=start, end_time=start + datetime.timedelta(hours=1))
+
+    client.force_login(client_profile.user)
+    content = client.get(reverse('mentor_profile', args=[mentor.slug])).content.decode()
+    assert 'У вас вже є активне бронювання' not in content
+    assert 'Забронювати' in content
+
+
+@pytest.mark.django_db
+def test_service_detail_rejects_malformed_time(client, slot_service):
+    """Перевіряє, що некоректний час повертає на сторінку послуги без бронювання"""
+    url = reverse('service_detail', args=[slot_service.id])
+    client.force_login(User.objects.create_user(username='malformed_client'))
+
+    response = client.post(url, {'date': '2099-06-03', 'time': '25:00'})
+
+    assert response.url == url
+    assert not Booking.objects.exists()
+
+
+@pytest.mark.django_db
+def test_profile_settings_saves_only_changed_fields(client):
+    """Перевіряє, що зберігається лише змінене поле, а решта даних і аватар лишаються без змін"""
+    user = User.objects.create_user(username='settings_client', first_name='Anna', last_name='Koval', email='anna@example.com')
+    profile = user.profile
+    profile.city = 'Київ'
+    profile.bio = 'Вчу Python'
+    profile.save()
+
+    client.force_login(user)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(reverse('profile_settings'), {
+            'first_name': 'Anna', 'last_name': 'Koval', 'email': 'anna@example.com',
+            'age': '', 'gender': '', 'city': 'Львів', 'bio': 'Вчу Python',
+        })
+    assert response.status_code == 302
+
+    updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+    assert len(updates) == 1
+    assert updates[0].startswith('UPDATE "user_profile" SET "city"')
+    assert 'avatar' not in updates[0]
+
+    profile.refresh_from_db()
+    assert (profile.city, profile.bio, profile.avatar.name) == ('Львів', 'Вчу Python', 'avatars/default.png')
+    user.refresh_from_db()
+    assert (user.first_name, user.email) == ('Anna', 'anna@example.com')
+
+
+@pytest.mark.django_db
+def test_add_review_rejects_second_review(client, django_assert_num_queries):
+    """Перевіряє, що відгук зберігається, а повторний відхиляється одним запитом бронювання"""
+    mentor = User.objects.create_user(username='review_mentor').profile
+    client_profile = User.objects.create_user(username='review_client').profile
+    start = timezone.now() - datetime.timedelta(days=1)
+    booking = Booking.objects.create(
+        client=client_profile, mentor=mentor, status='completed',
+        start_time=start, end_time=start + datetime.timedelta(hours=1)
+    )
+    url = reverse('add_review', args=[booking.id])
+
+    client.force_login(client_profile.user)
+    client.post(url, {'rating': 5, 'comment': 'Чудово'})
+    assert Review.objects.get(booking=booking).rating == 5
+
+    # Сесія, користувач, профіль і бронювання разом з відгуком через LEFT JOIN
+    with django_assert_num_queries(4):
+        response = client.post(url, {'rating': 1, 'comment': 'Ще раз'})
+    assert response.url == reverse('dashboard')
+    assert Review.objects.filter(booking=booking).count() == 1
+    assert Review.objects.get(booking=booking).rating == 5
@@ -1,55 +1,343 @@
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from google.auth.exceptions import GoogleAuthError
+from httplib2 import HttpLib2Error
+from cachetools import TTLCache
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import functools
+import heapq
+import logging
+import os
+import threading
+import time
+import weakref
 from zoneinfo import ZoneInfo
 from .models import Booking, WorkingHour
 
+logger = logging.getLogger(__name__)
+
+AVATAR_MAX_SIZE = (512, 512)
+
+KYIV_TZ = ZoneInfo('Europe/Kyiv')
+
+# What a Calendar call can fail with: API errors, token refresh, transport
+GOOGLE_API_ERRORS = (HttpError, GoogleAuthError, HttpLib2Error, OSError)
+GOOGLE_DELETE_ATTEMPTS = 3
+
+# Calendar clients sit on httplib2.Http, which is not thread-safe, so every thread
+# keeps its own (access token, credentials, client) per user id
+_thread_local = threading.local()
+
+# One token refresh per user at a time; the others reuse its result.
+# Weak values: a user's lock disappears once no thread is refreshing for them
+_refresh_locks = weakref.WeakValueDictionary()
+_refresh_locks_guard = threading.Lock()
+
+BUSY_PERIODS_CACHE_TTL = 90
+
+
+def busy_periods_cache_key(user_id, date_obj):
+    """Cache key for the user's FreeBusy data on a given date"""
+    return f'fb:{user_id}:{date_obj.strftime("%Y-%m-%d")}'
+
+
+def invalidate_busy_periods(user_id, date_obj):
+    """Dropping cached FreeBusy data after the user's calendar has changed"""
+    cache.delete(busy_periods_cache_key(user_id, date_obj))
+
+
+SLOTS_CACHE_TTL = 60
+
+
+def slots_version(mentor_id):
+    """
+    Current version of the mentor's cached slots
+    Entries of older versions are never read again and simply expire
+    """
+    key = f'slots_version:{mentor_id}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def slots_cache_key(mentor_id, date_obj, duration):
+    """Cache key for a mentor's free slots of one duration on a given date"""
+    return f'slots:{mentor_id}:{slots_version(mentor_id)}:{date_obj.strftime("%Y-%m-%d")}:{duration}'
+
+
+def invalidate_slots(mentor_id):
+    """Retiring all of the mentor's cached slots after their bookings or schedule have changed"""
+    cache.set(f'slots_version:{mentor_id}', time.time_ns(), None)
+
+
+def fast_date(value):
+    """
+    Parsing a 'YYYY-MM-DD' string by slicing, without strptime
+    Raises ValueError on malformed input, just like strptime
+    """
+    if (len(value) != 10 or value[4] != '-' or value[7] != '-'
+            or not (value[:4] + value[5:7] + value[8:]).isdecimal() or not value.isascii()):
+        raise ValueError(f"Invalid date: {value!r}")
+    return datetime.date(int(value[:4]), int(value[5:7]), int(value[8:]))
+
+
+def fast_datetime(date_str, time_str):
+    """Naive datetime from 'YYYY-MM-DD' and 'HH:MM' strings"""
+    if (len(time_str) != 5 or time_str[2] != ':'
+            or not (time_str[:2] + time_str[3:]).isdecimal() or not time_str.isascii()):
+        raise ValueError(f"Invalid time: {time_str!r}")
+    return datetime.datetime.combine(
+        fast_date(date_str),
+        datetime.time(int(time_str[:2]), int(time_str[3:]))
+    )
+
+
+MENTOR_PROFILE_CACHE_TTL = 300
+
+
+def mentor_profile_cache_key(slug):
+    """Cache key for a mentor's public profile with its active services"""
+    return f'mentor_profile:{slug}'
+
+
+def invalidate_mentor_profile(slug):
+    """Dropping the cached public profile after the mentor or their services changed"""
+    if slug:
+        cache.delete(mentor_profile_cache_key(slug))
+
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class HistoryPage:
+    """
+    One page of bookings ordered from newest to oldest, addressed by a cursor instead of OFFSET
+    The cursor is the (start_time, id) of the edge row, so each page is one
+    LIMIT per_page + 1 query and no COUNT, however deep the page is
+    """
+
+    def __init__(self, queryset, per_page, before=None, after=None):
+        before = self.decode_cursor(before)
+        after = None if before else self.decode_cursor(after)
+
+        if after:
+            start_time, pk = after
+            rows = list(queryset.filter(
+                Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=pk)
+            ).order_by('start_time', 'id')[:per_page + 1])
+            self.has_previous = len(rows) > per_page
+            self.has_next = True
+            rows = rows[:per_page][::-1]
+        else:
+            if before:
+                start_time, pk = before
+                queryset = queryset.filter(
+                    Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk)
+                )
+            rows = list(queryset.order_by('-start_time', '-id')[:per_page + 1])
+            self.has_next = len(rows) > per_page
+            self.has_previous = before is not None
+            rows = rows[:per_page]
+
+        self.object_list = rows
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+    @property
+    def next_cursor(self):
+        return self.encode_cursor(self.object_list[-1]) if self.object_list else ''
+
+    @property
+    def previous_cursor(self):
+        return self.encode_cursor(self.object_list[0]) if self.object_list else ''
+
+    @staticmethod
+    def encode_cursor(booking):
+        delta = booking.start_time - _EPOCH
+        return f'{delta // datetime.timedelta(microseconds=1)}_{booking.id}'
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """(start_time, id) from a cursor string; None if it is missing or malformed"""
+        try:
+            micros, pk = cursor.split('_')
+            return _EPOCH + datetime.timedelta(microseconds=int(micros)), int(pk)
+        except (AttributeError, ValueError, OverflowError):
+            return None
+
+
+def compress_avatar(image_file):
+    """
+    Downscaling an uploaded avatar and re-encoding it to WebP
+    Returns a new file ready to be saved into ImageField
+    """
+    image = ImageOps.exif_transpose(Image.open(image_file))
+    image.thumbnail(AVATAR_MAX_SIZE)
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=85)
+
+    name = os.path.splitext(os.path.basename(image_file.name))[0] + '.webp'
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def token_expiry(extra_data):
+    """
+    Access token expiry from social_django's auth_time + expires
+    Naive UTC, as google-auth expects; None if unknown
+    """
+    auth_time = extra_data.get('auth_time')
+    expires = extra_data.get('expires')
+    if not auth_time or not expires:
+        return None
+    expiry = datetime.datetime.fromtimestamp(auth_time + int(expires), datetime.timezone.utc)
+    return expiry.replace(tzinfo=None)
+
+
+def save_refreshed_token(social_auth, creds):
+    """
+    Writing a refreshed access token back to extra_data
+    Other requests and workers then reuse it instead of refreshing again
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    social_auth.extra_data['access_token'] = creds.token
+    social_auth.extra_data['auth_time'] = int(now.timestamp())
+    if creds.expiry:
+        social_auth.extra_data['expires'] = int((creds.expiry - now.replace(tzinfo=None)).total_seconds())
+    social_auth.save(update_fields=['extra_data'])
+
+
+def refresh_credentials(social_auth, creds):
+    """
+    Refreshing an expired access token under a per-user lock
+    A token already refreshed by another thread or worker is reused instead of refreshing again
+    """
+    with _refresh_locks_guard:
+        lock = _refresh_locks.get(social_auth.user_id)
+        if lock is None:
+            lock = _refresh_locks[social_auth.user_id] = threading.Lock()
+
+    with lock:
+        social_auth.refresh_from_db(fields=['extra_data'])
+        stored_token = social_auth.extra_data.get('access_token')
+        if stored_token and stored_token != creds.token:
+            creds.token = stored_token
+            creds.expiry = token_expiry(social_auth.extra_data)
+
+        if creds.expired:
+            creds.refresh(GoogleAuthRequest())
+            save_refreshed_token(social_auth, creds)
+
+
+@functools.cache
+def _calendar_discovery_doc():
+    """Calendar v3 discovery document bundled with googleapiclient, read once per process"""
+    return get_static_doc('calendar', 'v3')
+
+
+def _thread_service_cache():
+    """Per-thread cache of built Calendar clients"""
+    service_cache = getattr(_thread_local, 'service_cache', None)
+    if service_cache is None:
+        service_cache = _thread_local.service_cache = TTLCache(maxsize=256, ttl=600)
+    return service_cache
+
 
 def get_google_calendar_service(user):
     """
     Obtaining Google Calendar service for the user
     Returns None if Google OAuth is not connected
     """
-    if not hasattr(user, 'social_auth'):
+    # Denormalized flag: users without Google skip the social_auth query entirely
+    profile = getattr(user, 'profile', None)
+    if profile is None or not profile.has_google_oauth:
         return None
 
-    try:
-        social_auth = user.social_auth.get(provider='google-oauth2')
-    except:
+    # Iterating .all() reuses prefetch_related('...social_auth') when the caller did it
+    social_auth = next(
+        (sa for sa in user.social_auth.all() if sa.provider == 'google-oauth2'),
+        None
+    )
+    if not social_auth:
         return None
 
     access_token = social_auth.extra_data.get('access_token')
-    refresh_token = social_auth.extra_data.get('refresh_token')
-
-    creds = Credentials(
-        token=access_token,
-        refresh_token=refresh_token,
-        token_uri='https://oauth2.googleapis.com/token',
-        client_id=settings.SOCIAL_AUTH_GOOGLE_OAUTH2_KEY,
-        client_secret=settings.SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET,
-    )
-
-    return build('calendar', 'v3', credentials=creds)
-
 
-def get_busy_periods(user, date_str):
+    service_cache = _thread_service_cache()
+    cached = service_cache.get(user.id)
+    if cached and cached[0] == access_token:
+        _, creds, service = cached
+    else:
+        creds = Credentials(
+            token=access_token,
+            refresh_token=social_auth.extra_data.get('refresh_token'),
+            token_uri='https://oauth2.googleapis.com/token',
+            client_id=settings.SOCIAL_AUTH_GOOGLE_OAUTH2_KEY,
+            client_secret=settings.SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET,
+            expiry=token_expiry(social_auth.extra_data),
+        )
+        service = None
+
+    if creds.expired and creds.refresh_token:
+        try:
+            refresh_credentials(social_auth, creds)
+        except GOOGLE_API_ERRORS:
+            logger.exception("Google token refresh failed for user %s", user.id)
+            return None
+        access_token = creds.token
+
+    if service is None:
+        service = build_from_document(_calendar_discovery_doc(), credentials=creds)
+
+    service_cache[user.id] = (access_token, creds, service)
+    return service
+
+
+def get_busy_periods(user, date_obj):
     """
-    Retrieving busy periods from the user's Google Calendar
+    Retrieving busy periods from the user's Google Calendar for a date
+    Results are cached for a short time per user and date
     Returns a dict list with ‘start’ and ‘end’ keys (ISO format)
     """
+    cache_key = busy_periods_cache_key(user.id, date_obj)
+    busy = cache.get(cache_key)
+    if busy is not None:
+        return busy
+
     service = get_google_calendar_service(user)
     if not service:
         return []
 
-    date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-    kyiv_tz = ZoneInfo('Europe/Kyiv')
-
-    local_start = datetime.datetime.combine(date_obj, datetime.time.min, tzinfo=kyiv_tz)
-    local_end = datetime.datetime.combine(date_obj, datetime.time.max, tzinfo=kyiv_tz)
+    utc_start = datetime.datetime.combine(
+        date_obj, datetime.time.min, tzinfo=KYIV_TZ
+    ).astimezone(datetime.timezone.utc)
+    utc_end = utc_start + datetime.timedelta(days=1)
 
-    time_min = local_start.astimezone(datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
-    time_max = local_end.astimezone(datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
+    time_min = utc_start.strftime('%Y-%m-%dT%H:%M:%SZ')
+    time_max = utc_end.strftime('%Y-%m-%dT%H:%M:%SZ')
 
     body = {
         "timeMin": time_min,
@@ -59,18 +347,21 @@ def get_busy_periods(user, date_str):
 
     try:
         events_result = service.freebusy().query(body=body).execute()
-        return events_result['calendars']['primary']['busy']
-    except Exception as e:
-        print(f"Google API Error: {e}")
+        busy = events_result['calendars']['primary']['busy']
+        cache.set(cache_key, busy, BUSY_PERIODS_CACHE_TTL)
+        return busy
+    except GOOGLE_API_ERRORS:
+        logger.exception("Google FreeBusy query failed for user %s", user.id)
         return []
 
 
-def create_google_event(user, start_dt, duration_minutes, summary, description=None):
+def create_google_event(user, start_dt, duration_minutes, summary, description=None, calendar_service=None):
     """
     Create an event in the user's Google Calendar
+    An already built calendar_service skips the lookup (and its DB query)
     Returns event_id or None if an error occurs
     """
-    service = get_google_calendar_service(user)
+    service = calendar_service or get_google_calendar_service(user)
     if not service:
         return None
 
@@ -91,25 +382,130 @@ def create_google_event(user, start_dt, duration_minutes, summary, description=N
 
     try:
         event = service.events().insert(calendarId='primary', body=event_body).execute()
+        invalidate_busy_periods(user.id, start_dt)
         return event['id']
-    except Exception as e:
-        print(f"Error creating event: {e}")
+    except GOOGLE_API_ERRORS:
+        logger.exception("Failed to create Google event for user %s", user.id)
         return None
 
 
-def is_time_busy(slot_start, slot_end, busy_intervals):
+def delete_google_events(deletions):
     """
-    Checks whether the slot overlaps with occupied intervals
-    Returns True if the slot is occupied
+    Deleting events from one or more users' Google Calendars in one batch HTTP request
+    deletions: list of (calendar_service, event_id) pairs
+    Every sub-request is signed with its own user's credentials
+    Already deleted events (404/410) count as done; 429/5xx failures are retried with backoff
     """
-    for busy in busy_intervals:
-        busy_start = busy['start']
-        busy_end = busy['end']
+    for attempt in range(GOOGLE_DELETE_ATTEMPTS):
+        if not deletions:
+            return
+        if attempt:
+            time.sleep(2 ** attempt)
+
+        retry = []
+
+        def on_response(request_id, response, exception):
+            if exception is None:
+                return
+            status = exception.resp.status if isinstance(exception, HttpError) else None
+            if status in (404, 410):
+                return
+            if status is not None and (status == 429 or status >= 500):
+                retry.append(deletions[int(request_id)])
+            else:
+                logger.error("Failed to delete Google event: %s", exception)
+
+        batch = deletions[0][0].new_batch_http_request(callback=on_response)
+        for index, (calendar_service, event_id) in enumerate(deletions):
+            batch.add(
+                calendar_service.events().delete(calendarId='primary', eventId=event_id),
+                request_id=str(index)
+            )
+
+        try:
+            batch.execute()
+        except GOOGLE_API_ERRORS:
+            logger.exception("Google batch delete of %s events failed", len(deletions))
+            retry = list(deletions)
+
+        deletions = retry
+
+    if deletions:
+        logger.error("Gave up deleting %s Google events after %s attempts", len(deletions), GOOGLE_DELETE_ATTEMPTS)
+
+
+def run_in_parallel(*calls):
+    """
+    Running independent Google API calls concurrently
+    Each call is a zero-argument callable or None; failures become None
+    Returns results in the same order as the calls
+    """
+    def call_quietly(call):
+        try:
+            return call()
+        except Exception:
+            logger.exception("Google API call failed")
+            return None
+
+    if not any(calls):
+        return [None] * len(calls)
 
-        if slot_start < busy_end and slot_end > busy_start:
-            return True
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(call_quietly, call) if call else None for call in calls]
 
-    return False
+    return [future.result() if future else None for future in futures]
+
+
+def merge_intervals(intervals):
+    """
+    Merging overlapping busy intervals; the input must already be ordered by start
+    Returns a list of disjoint (start, end) tuples ordered by start
+    """
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def local_minutes(moment, midnight, round_up=False):
+    """
+    Wall-clock offset of an aware datetime from local midnight, in whole minutes
+    Interval ends are rounded up so a partially busy minute stays busy
+    """
+    delta = moment.astimezone(KYIV_TZ).replace(tzinfo=None) - midnight
+    minutes, seconds = divmod(int(delta.total_seconds()), 60)
+    return minutes + 1 if round_up and seconds else minutes
+
+
+def iter_free_slots(work_start, work_end, busy_intervals, duration, step):
+    """
+    Sweep over merged busy intervals yielding slots that fit into the free gaps
+    All values are minutes since midnight
+    Slots stay on the work_start + k * step grid; busy regions are skipped, not tested
+    """
+    gap_start = work_start
+
+    for busy_start, busy_end in busy_intervals + [(work_end, work_end)]:
+        gap_end = min(busy_start, work_end)
+
+        slot = work_start + -(-max(gap_start - work_start, 0) // step) * step
+
+        while slot + duration <= gap_end:
+            yield slot
+            slot += step
+
+        gap_start = max(gap_start, busy_end)
+        if gap_start >= work_end:
+            break
+
+
+def get_working_hours_by_day(mentor):
+    """Mentor's whole week schedule in one query, keyed by day of week"""
+    return {wh.day_of_week: wh for wh in WorkingHour.objects.filter(mentor=mentor)}
 
 
 def get_available_slots(user, date_obj, duration_minutes):
@@ -117,67 +513,66 @@ def get_available_slots(user, date_obj, duration_minutes):
     Obtaining a list of available time slots for booking
 
     Algorithm:
-    1. Obtain the mentor's work schedule for the day
+    1. Obtain the mentor's work schedule for the day (Profile.weekly_schedule)
     2. Obtain busy periods from Google Calendar
     3. Obtain local bookings from the database
-        4. Generate slots with an interval (duration + 15 min break)
-    5. Filter busy slots
+    4. Convert everything to minutes since midnight and merge the two
+       start-ordered streams of busy intervals
+    5. Sweep the free gaps between them, emitting slots
+       with an interval (duration + 15 min break)
 
     Returns:
     list: List of available slots in ‘HH:MM’ format
     """
+    if isinstance(date_obj, datetime.datetime):
+        date_obj = date_obj.date()
+
+    mentor = user.profile
     day_num = date_obj.weekday()
-    working_hour = WorkingHour.objects.filter(
-        mentor__user=user,
-        day_of_week=day_num
-    ).first()
 
-    if not working_hour:
+    # Cached copy of the WorkingHour rows, no query needed
+    hours = mentor.weekly_schedule.get(str(day_num))
+    if not hours:
         return []
+    work_start, work_end = hours
 
-    work_start = datetime.datetime.combine(date_obj, working_hour.start_time)
-    work_end = datetime.datetime.combine(date_obj, working_hour.end_time)
+    midnight = datetime.datetime.combine(date_obj, datetime.time.min)
 
-    all_busy_intervals = []
-    kyiv_tz = ZoneInfo('Europe/Kyiv')
-
-    google_busy = get_busy_periods(user, date_obj.strftime('%Y-%m-%d'))
-
-    for item in google_busy:
+    google_intervals = []
+    for item in get_busy_periods(user, date_obj):
         s_utc = datetime.datetime.fromisoformat(item['start'].replace('Z', '+00:00'))
         e_utc = datetime.datetime.fromisoformat(item['end'].replace('Z', '+00:00'))
 
-        s_local_aware = s_utc.astimezone(kyiv_tz)
-        e_local_aware = e_utc.astimezone(kyiv_tz)
-
-        s_local = s_local_aware.replace(tzinfo=None)
-        e_local = e_local_aware.replace(tzinfo=None)
+        google_intervals.append((
+            local_minutes(s_utc, midnight),
+            local_minutes(e_utc, midnight, round_up=True)
+        ))
 
-        all_busy_intervals.append({'start': s_local, 'end': e_local})
+    # FreeBusy already returns windows in time order, so this sort is a linear check
+    google_intervals.sort()
 
+    day_start = midnight.replace(tzinfo=KYIV_TZ)
     local_bookings = Booking.objects.filter(
-        mentor__user=user,
-        start_time__date=date_obj,
-        status='confirmed'
+        mentor=mentor,
+        start_time__gte=day_start,
+        start_time__lt=day_start + datetime.timedelta(days=1),
+        status=Booking.Status.CONFIRMED
+    ).order_by('start_time').values_list('start_time', 'end_time')
+
+    booking_intervals = (
+        (local_minutes(start_time, midnight), local_minutes(end_time, midnight, round_up=True))
+        for start_time, end_time in local_bookings
     )
 
-    for booking in local_bookings:
-        all_busy_intervals.append({
-            'start': booking.start_time.replace(tzinfo=None),
-            'end': booking.end_time.replace(tzinfo=None)
-        })
-
-    available_slots = []
-    current_slot = work_start
-
-    step_minutes = duration_minutes + 15
-
-    while current_slot + datetime.timedelta(minutes=duration_minutes) <= work_end:
-        slot_end = current_slot + datetime.timedelta(minutes=duration_minutes)
-
-        if not is_time_busy(current_slot, slot_end, all_busy_intervals):
-            available_slots.append(current_slot.strftime('%H:%M'))
-
-        current_slot += datetime.timedelta(minutes=step_minutes)
-
-    return available_slots
\ No newline at end of file
+    busy_intervals = merge_intervals(heapq.merge(google_intervals, booking_intervals))
+
+    return [
+        f'{slot // 60:02d}:{slot % 60:02d}'
+        for slot in iter_free_slots(
+            work_start,
+            work_end,
+            busy_intervals,
+            duration_minutes,
+            duration_minutes + 15
+        )
+    ]
@@ -1,11 +1,14 @@
 import datetime
+from functools import partial
 from django.contrib.auth import login
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse
 from django.utils import timezone
 from django.contrib import messages
-from django.core.paginator import Paginator
+from django.core.cache import cache
 
 from .forms import (
     CustomUserCreationForm,
@@ -22,10 +25,17 @@ from .models import (
     Review
 )
 from .utils import (
+    HistoryPage,
+    MENTOR_PROFILE_CACHE_TTL,
+    SLOTS_CACHE_TTL,
+    mentor_profile_cache_key,
+    slots_cache_key,
+    fast_date,
+    fast_datetime,
     get_available_slots,
-    create_google_event,
-    get_google_calendar_service
+    get_working_hours_by_day
 )
+from .tasks import enqueue, sync_booking_to_calendar
 
 
 def home(request: HttpRequest) -> HttpResponse:
@@ -35,12 +45,47 @@ def home(request: HttpRequest) -> HttpResponse:
 
 def mentor_profile(request: HttpRequest, slug: str) -> HttpResponse:
     """Public profile of the mentor with his services"""
-    mentor = get_object_or_404(Profile, slug=slug, role='mentor')
-    services = mentor.services.filter(is_active=True)
+    mentor = request.profile_by_slug.get(slug) or cache.get(mentor_profile_cache_key(slug))
+    if mentor is None:
+        # The object is pickled into the shared cache: load only what the page shows,
+        # so no password hash or e-mail of the mentor ends up there
+        mentor = get_object_or_404(
+            Profile.objects.select_related('user').only(
+                'id', 'role', 'slug', 'avatar', 'bio', 'age', 'gender', 'city', 'position',
+                'rating_avg', 'user__first_name', 'user__last_name'
+            ).prefetch_related(
+                Prefetch(
+                    'services',
+                    queryset=Service.objects.filter(is_active=True).only(
+                        'id', 'mentor', 'title', 'description', 'duration', 'price'
+                    ),
+                    to_attr='active_services'
+                )
+            ),
+            slug=slug,
+            role=Profile.Role.MENTOR
+        )
+        cache.set(mentor_profile_cache_key(slug), mentor, MENTOR_PROFILE_CACHE_TTL)
+    request.profile_by_slug[slug] = mentor
+
+    # The cached mentor is shared by all viewers, so the per-client flag is a
+    # separate EXISTS over the booking_unique_active_pair index. A finished lesson
+    # the sweep hasn't completed yet doesn't count, matching service_detail's retry
+    has_active = (
+        request.user.is_authenticated
+        and request.profile.pk != mentor.pk
+        and Booking.objects.filter(
+            client=request.profile,
+            mentor=mentor,
+            status=Booking.Status.CONFIRMED,
+            end_time__gt=timezone.now()
+        ).exists()
+    )
 
     return render(request, 'user/mentor_profile.html', {
         'mentor': mentor,
-        'services': services
+        'services': mentor.active_services,
+        'has_active': has_active
     })
 
 
@@ -51,10 +96,8 @@ def register(request: HttpRequest) -> HttpResponse:
     """
     if request.method == 'GET':
         role_param = request.GET.get('role')
-        if role_param == 'mentor':
-            request.session['registration_role'] = 'mentor'
-        elif role_param == 'client':
-            request.session['registration_role'] = 'client'
+        if role_param in Profile.Role.values:
+            request.session['registration_role'] = role_param
 
         form = CustomUserCreationForm()
         return render(request, 'registration/register.html', {'form': form})
@@ -64,7 +107,7 @@ def register(request: HttpRequest) -> HttpResponse:
         if form.is_valid():
             user = form.save()
 
-            role = request.session.get('registration_role', 'client')
+            role = request.session.get('registration_role', Profile.Role.CLIENT)
             user.profile.role = role
             user.profile.save()
 
@@ -84,50 +127,63 @@ def dashboard(request: HttpRequest) -> HttpResponse:
     """
     Personal account homepage
     Shows active classes and history for clients and mentors
-    Automatically changes old bookings to ‘completed’ status
+    Old bookings are moved to ‘completed’ by the complete_bookings command
     """
-    profile = request.user.profile
+    profile = request.profile
     now = timezone.now()
 
-    Booking.objects.filter(
-        status='confirmed',
-        end_time__lt=now
-    ).update(status='completed')
+    is_mentor = profile.role == Profile.Role.MENTOR
 
-    client_active = Booking.objects.filter(
-        client=profile,
+    # Upcoming bookings for both roles in one query, split below
+    own_bookings = Q(client=profile) | Q(mentor=profile) if is_mentor else Q(client=profile)
+    upcoming = Booking.objects.filter(
+        own_bookings,
         start_time__gte=now,
-        status='confirmed'
-    ).select_related('mentor__user', 'service').order_by('start_time')
+        status=Booking.Status.CONFIRMED
+    ).select_related('mentor__user', 'client__user', 'service').only(
+        'id', 'start_time', 'note', 'client_id', 'mentor_id', 'service__title',
+        'mentor__user__first_name', 'mentor__user__last_name',
+        'client__user__first_name', 'client__user__last_name', 'client__user__email'
+    ).order_by('start_time')
+
+    client_active = []
+    mentor_active = []
+    for booking in upcoming:
+        if booking.client_id == profile.id:
+            client_active.append(booking)
+        if booking.mentor_id == profile.id:
+            mentor_active.append(booking)
 
     client_history_list = Booking.objects.filter(
         client=profile,
         start_time__lt=now
-    ).select_related('mentor__user', 'service', 'review').order_by('-start_time').distinct()
+    ).select_related('mentor__user', 'service', 'review').only(
+        'id', 'start_time', 'service__title',
+        'mentor__user__first_name', 'mentor__user__last_name', 'review__rating'
+    )
 
-    paginator_client = Paginator(client_history_list, 10)
-    page_number_client = request.GET.get('client_page')
-    client_history = paginator_client.get_page(page_number_client)
+    client_history = HistoryPage(
+        client_history_list, 10,
+        before=request.GET.get('client_before'),
+        after=request.GET.get('client_after')
+    )
 
-    mentor_active = []
     mentor_history = []
-    is_mentor = profile.role == 'mentor'
 
     if is_mentor:
-        mentor_active = Booking.objects.filter(
-            mentor=profile,
-            start_time__gte=now,
-            status='confirmed'
-        ).select_related('client__user', 'service').order_by('start_time')
-
         mentor_history_list = Booking.objects.filter(
             mentor=profile,
             start_time__lt=now
-        ).select_related('client__user', 'service', 'review').order_by('-start_time').distinct()
+        ).select_related('client__user', 'service', 'review').only(
+            'id', 'start_time', 'service__title',
+            'client__user__first_name', 'client__user__last_name', 'review__rating'
+        )
 
-        paginator_mentor = Paginator(mentor_history_list, 10)
-        page_number_mentor = request.GET.get('mentor_page')
-        mentor_history = paginator_mentor.get_page(page_number_mentor)
+        mentor_history = HistoryPage(
+            mentor_history_list, 10,
+            before=request.GET.get('mentor_before'),
+            after=request.GET.get('mentor_after')
+        )
 
     return render(request, 'user/dashboard.html', {
         'client_active': client_active,
@@ -143,16 +199,20 @@ def profile_settings(request: HttpRequest) -> HttpResponse:
     """Editing personal data and user profile"""
     if request.method == 'POST':
         u_form = UserUpdateForm(request.POST, instance=request.user)
-        p_form = ProfileUpdateForm(request.POST, request.FILES, instance=request.user.profile)
+        p_form = ProfileUpdateForm(request.POST, request.FILES, instance=request.profile)
 
         if u_form.is_valid() and p_form.is_valid():
-            u_form.save()
-            p_form.save()
+            # Only changed fields are written; an untouched form costs no UPDATE
+            # and the avatar file is stored only when it was actually replaced
+            if u_form.has_changed():
+                u_form.instance.save(update_fields=u_form.changed_data)
+            if p_form.has_changed():
+                p_form.instance.save(update_fields=p_form.changed_data)
             messages.success(request, 'Ваш профіль оновлено! 🌟')
             return redirect('profile_settings')
     else:
         u_form = UserUpdateForm(instance=request.user)
-        p_form = ProfileUpdateForm(instance=request.user.profile)
+        p_form = ProfileUpdateForm(instance=request.profile)
 
     return render(request, 'user/profile_settings.html', {
         'u_form': u_form,
@@ -166,21 +226,26 @@ def my_services(request: HttpRequest) -> HttpResponse:
     Mentor service management page
     Allows you to create, view, and delete services
     """
-    if request.user.profile.role != 'mentor':
+    if request.profile.role != Profile.Role.MENTOR:
         return redirect('dashboard')
 
     if request.method == 'POST':
         form = ServiceForm(request.POST)
         if form.is_valid():
             service = form.save(commit=False)
-            service.mentor = request.user.profile
+            service.mentor = request.profile
             service.save()
             messages.success(request, 'Послугу успішно додано! 🚀')
             return redirect('my_services')
     else:
         form = ServiceForm()
 
-    services = request.user.profile.services.all().order_by('-is_active', '-id')
+    # Materialized once: the template needs both the count and the rows
+    services = list(
+        request.profile.services.only(
+            'id', 'mentor', 'title', 'description', 'duration', 'price', 'is_active'
+        ).order_by('-is_active', '-id')
+    )
 
     return render(request, 'user/my_services.html', {
         'form': form,
@@ -191,7 +256,12 @@ def my_services(request: HttpRequest) -> HttpResponse:
 @login_required
 def delete_service(request: HttpRequest, service_id: int) -> HttpResponse:
     """Removal of mentor service"""
-    service = get_object_or_404(Service, id=service_id, mentor=request.user.profile)
+    # Joining the mentor's slug lets the cache-invalidation signal skip its own lookup
+    service = get_object_or_404(
+        Service.objects.select_related('mentor').only('id', 'mentor__slug'),
+        id=service_id,
+        mentor=request.profile
+    )
     service.delete()
     messages.warning(request, 'Послугу видалено.')
     return redirect('my_services')
@@ -204,50 +274,56 @@ def schedule_settings(request: HttpRequest) -> HttpResponse:
     Allows you to set working hours for each day
     """
     # Доступ тільки для менторів
-    if request.user.profile.role != 'mentor':
+    if request.profile.role != Profile.Role.MENTOR:
         return redirect('dashboard')
 
-    days_names = [
-        'Понеділок', 'Вівторок', 'Середа', 'Четвер',
-        'П\'ятниця', 'Субота', 'Неділя'
-    ]
+    days_names = WorkingHour.Day.labels
+    profile = request.profile
+    existing_hours = get_working_hours_by_day(profile)
 
     if request.method == 'POST':
+        to_create = []
+        to_update = []
+        to_delete_days = []
+
         for day_num in range(7):
             is_active = request.POST.get(f'day_{day_num}_active')
             start_time = request.POST.get(f'day_{day_num}_start')
             end_time = request.POST.get(f'day_{day_num}_end')
 
-            existing_hour = WorkingHour.objects.filter(
-                mentor=request.user.profile,
-                day_of_week=day_num
-            ).first()
+            existing_hour = existing_hours.get(day_num)
 
             if is_active and start_time and end_time:
                 if existing_hour:
                     existing_hour.start_time = start_time
                     existing_hour.end_time = end_time
-                    existing_hour.save()
+                    to_update.append(existing_hour)
                 else:
-                    WorkingHour.objects.create(
-                        mentor=request.user.profile,
+                    to_create.append(WorkingHour(
+                        mentor=profile,
                         day_of_week=day_num,
                         start_time=start_time,
                         end_time=end_time
-                    )
-            else:
-                if existing_hour:
-                    existing_hour.delete()
+                    ))
+            elif existing_hour:
+                to_delete_days.append(day_num)
+
+        if to_create:
+            WorkingHour.objects.bulk_create(to_create)
+        if to_update:
+            WorkingHour.objects.bulk_update(to_update, ['start_time', 'end_time'])
+        if to_delete_days:
+            WorkingHour.objects.filter(mentor=profile, day_of_week__in=to_delete_days).delete()
+
+        # bulk_create/bulk_update send no signals, so refresh the cached schedule here
+        profile.update_working_hours()
 
         messages.success(request, 'Графік роботи оновлено! 📅')
         return redirect('schedule_settings')
 
     schedule_data = []
     for day_num in range(7):
-        wh = WorkingHour.objects.filter(
-            mentor=request.user.profile,
-            day_of_week=day_num
-        ).first()
+        wh = existing_hours.get(day_num)
 
         schedule_data.append({
             'num': day_num,
@@ -267,95 +343,87 @@ def service_detail(request: HttpRequest, service_id: int) -> HttpResponse:
     Shows available slots for the selected date
     Syncs with Google Calendar (if connected)
     """
-    service = get_object_or_404(Service, id=service_id)
+    service = get_object_or_404(
+        Service.objects.select_related('mentor__user').only(
+            'id', 'title', 'description', 'duration', 'price',
+            'mentor__slug', 'mentor__avatar', 'mentor__has_google_oauth', 'mentor__weekly_schedule',
+            'mentor__user__first_name', 'mentor__user__last_name'
+        ),
+        id=service_id
+    )
     available_slots = []
     selected_date = request.GET.get('date')
     error_message = None
 
     if selected_date:
         try:
-            date_obj = datetime.datetime.strptime(selected_date, '%Y-%m-%d')
-            available_slots = get_available_slots(
-                service.mentor.user,
-                date_obj,
-                service.duration
-            )
+            date_obj = fast_date(selected_date)
+            # The key carries the mentor's slots version, so a result computed before
+            # a booking or schedule change is stored under a key nobody reads any more
+            cache_key = slots_cache_key(service.mentor_id, date_obj, service.duration)
+            available_slots = cache.get(cache_key)
+            if available_slots is None:
+                available_slots = get_available_slots(
+                    service.mentor.user,
+                    date_obj,
+                    service.duration
+                )
+                cache.set(cache_key, available_slots, SLOTS_CACHE_TTL)
         except ValueError:
             pass
 
     if request.method == 'POST':
-        has_active = Booking.objects.filter(
-            client=request.user.profile,
-            mentor=service.mentor,
-            status='confirmed',
-            start_time__gte=timezone.now()
-        ).exists()
-
-        if has_active:
-            messages.warning(
-                request,
-                '⚠️ Ви вже маєте активний запис до цього ментора. Дочекайтесь завершення.'
-            )
-            return redirect('dashboard')
-
         date_str = request.POST.get('date')
         time_str = request.POST.get('time')
         note_text = request.POST.get('note', '')[:500]
 
         if date_str and time_str:
-            start_dt = datetime.datetime.strptime(
-                f"{date_str} {time_str}",
-                "%Y-%m-%d %H:%M"
-            )
-
-            client_email = request.user.email if request.user.email else "Email не вказано в профілі"
-
-            summary = f"{service.title} - {request.user.first_name}"
-
-            google_description = (
-                f"Клієнт: {request.user.first_name} {request.user.last_name}\n"  # Додав прізвище, якщо є
-                f"Email: {client_email}\n"  # Тепер тут ніколи не буде пусто
-                f"📞 {note_text}"
-            )
-
-            mentor_event_id = None
-            if service.mentor.user.social_auth.exists():
-                try:
-                    mentor_event_id = create_google_event(
-                        service.mentor.user,
-                        start_dt,
-                        service.duration,
-                        summary,
-                        description=google_description
+            try:
+                start_dt = fast_datetime(date_str, time_str)
+            except ValueError:
+                messages.error(request, 'Некоректна дата або час бронювання.')
+                return redirect('service_detail', service_id=service.id)
+
+            def create_booking():
+                with transaction.atomic():
+                    return Booking.objects.create(
+                        client=request.profile,
+                        mentor=service.mentor,
+                        service=service,
+                        start_time=start_dt,
+                        end_time=start_dt + datetime.timedelta(minutes=service.duration),
+                        price_at_booking=service.price,
+                        status=Booking.Status.CONFIRMED,
+                        note=note_text
                     )
-                except Exception:
-                    pass
-
-            client_event_id = None
-            if request.user.social_auth.exists():
-                try:
-                    client_event_id = create_google_event(
-                        request.user,
-                        start_dt,
-                        service.duration,
-                        f"{service.title} - {service.mentor.user.first_name}",
-                        description=f"Ментор: {service.mentor.user.first_name}\nПослуга: {service.title}"
+
+            # Both "one active booking per client and mentor" and "one booking per slot"
+            # are enforced by unique constraints, so the common path is a single INSERT
+            pair_bookings = Booking.objects.filter(client=request.profile, mentor=service.mentor)
+            try:
+                booking = create_booking()
+            except IntegrityError:
+                booking = None
+                # A finished booking the periodic sweep hasn't completed yet still holds the pair
+                if Booking.complete_finished(pair_bookings):
+                    try:
+                        booking = create_booking()
+                    except IntegrityError:
+                        pass
+
+            if booking is None:
+                if pair_bookings.filter(status=Booking.Status.CONFIRMED).exists():
+                    messages.warning(
+                        request,
+                        '⚠️ Ви вже маєте активний запис до цього ментора. Дочекайтесь завершення.'
                     )
-                except Exception:
-                    pass
-
-            Booking.objects.create(
-                client=request.user.profile,
-                mentor=service.mentor,
-                service=service,
-                start_time=start_dt,
-                end_time=start_dt + datetime.timedelta(minutes=service.duration),
-                google_event_id=mentor_event_id,
-                client_google_event_id=client_event_id,
-                price_at_booking=service.price,
-                status='confirmed',
-                note=note_text
-            )
+                    return redirect('dashboard')
+
+                messages.warning(request, '⚠️ Цей час уже зайнято. Оберіть інший слот.')
+                return redirect('service_detail', service_id=service.id)
+
+            if service.mentor.has_google_oauth or request.profile.has_google_oauth:
+                transaction.on_commit(partial(enqueue, sync_booking_to_calendar, booking.id))
 
             messages.success(request, 'Бронювання успішне! 🎉')
             return redirect('dashboard')
@@ -374,35 +442,19 @@ def cancel_booking(request: HttpRequest, booking_id: int) -> HttpResponse:
     Cancellation of a reservation by a customer
     Automatically deletes events from both parties' Google Calendars
     """
-    booking = get_object_or_404(Booking, id=booking_id, client=request.user.profile)
-
-    if booking.start_time < timezone.now():
+    # The past-booking check is part of the DELETE; calendar cleanup is queued by a post_delete signal
+    deleted, _ = Booking.objects.filter(
+        id=booking_id,
+        client=request.profile,
+        start_time__gte=timezone.now()
+    ).delete()
+
+    if not deleted:
+        if not Booking.objects.filter(id=booking_id, client=request.profile).exists():
+            raise Http404
         messages.error(request, "Не можна скасувати минуле заняття.")
         return redirect('dashboard')
 
-    if booking.google_event_id and booking.mentor.user.social_auth.exists():
-        try:
-            service = get_google_calendar_service(booking.mentor.user)
-            if service:
-                service.events().delete(
-                    calendarId='primary',
-                    eventId=booking.google_event_id
-                ).execute()
-        except Exception as e:
-            print(f"Помилка видалення у ментора: {e}")
-
-    if booking.client_google_event_id and request.user.social_auth.exists():
-        try:
-            service = get_google_calendar_service(request.user)
-            if service:
-                service.events().delete(
-                    calendarId='primary',
-                    eventId=booking.client_google_event_id
-                ).execute()
-        except Exception as e:
-            print(f"Помилка видалення у клієнта: {e}")
-
-    booking.delete()
     messages.info(request, "Бронювання скасовано, календар оновлено.")
     return redirect('dashboard')
 
@@ -413,7 +465,12 @@ def add_review(request: HttpRequest, booking_id: int) -> HttpResponse:
     Adding a review by the client after the lesson is completed
     One review per booking
     """
-    booking = get_object_or_404(Booking, id=booking_id, client=request.user.profile)
+    # The LEFT JOIN on review lets hasattr() answer from the cache, without a query
+    booking = get_object_or_404(
+        Booking.objects.select_related('review', 'service', 'mentor__user'),
+        id=booking_id,
+        client=request.profile
+    )
 
     if hasattr(booking, 'review'):
         messages.warning(request, "Ви вже залишили відгук для цього заняття.")